@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 from typing import Any
 
 from aidial_client import AsyncDial
@@ -12,6 +13,12 @@ from task.utils.constants import TOOL_CALL_HISTORY_KEY
 from task.utils.history import unpack_messages
 from task.utils.stage import StageProcessor
 
+_logger = logging.getLogger(__name__)
+
+# Start order for a multi-tool turn: slow tools are kicked off first so their latency overlaps
+# with the quicker ones instead of queueing behind them
+_TOOL_START_ORDER = {"slow": 0, "medium": 1, "fast": 2}
+
 
 class GeneralPurposeAgent:
 
@@ -29,6 +36,9 @@ class GeneralPurposeAgent:
         # 2. Prepare tools_dict where key will be tool name and vale tool itself. It will help us to find tool faster
         #    on the tool call step
         self._tools_dict = {tool.name: tool for tool in tools}
+        # Tool schemas never change at runtime; freeze the list once instead of rebuilding it on
+        # every (recursive) turn of handle_request
+        self._tool_schemas = [tool.schema for tool in tools]
         # 3. Create dict with `state` name. Inside this dict we need to add `TOOL_CALL_HISTORY_KEY` with empty array.
         #    Here, in state, we will 'hide' tool call history. We need it since we need to preserve full conversation history.
         self.state: dict[str, Any] = {
@@ -52,7 +62,7 @@ class GeneralPurposeAgent:
         #    - make it stream
         chunks = await dial_client.chat.completions.create(
             messages=self._prepare_messages(request.messages),
-            tools=[tool.schema for tool in self.tools],
+            tools=self._tool_schemas,
             deployment_name=deployment_name,
             stream=True,
         )
@@ -61,7 +71,7 @@ class GeneralPurposeAgent:
         #      Take a look how tool call streaming output is looks like, it is important! -> https://platform.openai.com/docs/guides/function-calling#streaming
         #   - `content`, here we will collect the content from streaming
         tool_call_index_map: dict[int, ToolCall] = {}
-        content = ""
+        content_parts: list[str] = []
         # 4. Make async loop through `chunks` and then we need to collect content, tool calls and attachments:
         #   - If chunk has `choices` then:
         #       - Get 1st choice `delta`
@@ -84,7 +94,7 @@ class GeneralPurposeAgent:
                 
             if delta and delta.content:
                 choice.append_content(delta.content)
-                content += delta.content
+                content_parts.append(delta.content)
                 
             if delta.tool_calls:
                 for tool_call_delta in delta.tool_calls:
@@ -100,7 +110,7 @@ class GeneralPurposeAgent:
         #    will show you the notification that it is deprecated but we need to use it because DIAL SDK is built on top of pydentic.v1)
         assistant_message = Message(
             role=Role.ASSISTANT,
-            content=content,
+            content=''.join(content_parts),
             tool_calls=[ToolCall.validate(tool_call_delta) for tool_call_delta in tool_call_index_map.values()]
         )
         # 6. Now we at the point where we need to understand if its 'final result' from orchestration model or not:
@@ -113,11 +123,18 @@ class GeneralPurposeAgent:
         #       - extend the `state` `TOOL_CALL_HISTORY_KEY` with tool_messages that we executed above
         #       - finally make recursive call
         if assistant_message.tool_calls:
-            tasks = []
-            for tool_call in assistant_message.tool_calls:
-                conversation_id = request.headers.get("x-conversation-id", "")
-                tasks.append(self._process_tool_call(tool_call, choice, request.api_key, conversation_id))
-            tool_messages = await asyncio.gather(*tasks)
+            # Tool calls of one turn run concurrently: tool instances hold no per-call mutable
+            # state (shared clients are lock-guarded), so gather is safe and the turn costs
+            # max-of-latencies instead of sum. Tasks are created slowest-first so e.g. image
+            # generation starts before the millisecond-scale MCP calls; results are gathered in
+            # the original tool call order.
+            conversation_id = request.headers.get("x-conversation-id", "")
+            tasks = {
+                tool_call.id: asyncio.create_task(
+                    self._process_tool_call(tool_call, choice, request.api_key, conversation_id))
+                for tool_call in sorted(assistant_message.tool_calls, key=self._tool_start_rank)
+            }
+            tool_messages = await asyncio.gather(*(tasks[tool_call.id] for tool_call in assistant_message.tool_calls))
             self.state[TOOL_CALL_HISTORY_KEY].append(assistant_message.model_dump(exclude_none=True))
             self.state[TOOL_CALL_HISTORY_KEY].extend(tool_messages)
             return await self.handle_request(deployment_name, choice, request, response)
@@ -125,6 +142,12 @@ class GeneralPurposeAgent:
         choice.set_state(self.state)
         # return assistant_message
 
+    def _tool_start_rank(self, tool_call: ToolCall) -> int:
+        tool = self._tools_dict.get(tool_call.function.name)
+        if tool is None:
+            return _TOOL_START_ORDER["medium"]
+        return _TOOL_START_ORDER.get(tool.estimated_latency_class, _TOOL_START_ORDER["medium"])
+
     def _prepare_messages(self, messages: list[Message]) -> list[dict[str, Any]]:
         #TODO:
         # 1. Unpack messages with `unpack_messages` method (it is implemented, just check the logic in this method)
@@ -136,10 +159,10 @@ class GeneralPurposeAgent:
             "role": Role.SYSTEM,
             "content": self.system_prompt
         })
-        # 3. Print history: iterate through unpacked messages and print as json (json.dumps)
-        print("\nHistory:")
-        for message in unpacked_messages:
-            print(json.dumps(message, indent=2))
+        # 3. Log history as json. Serialization happens only when debug logging is enabled, so the
+        #    per-turn hot path doesn't pay for dumping the full conversation to stdout.
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("History:\n%s", "\n".join(json.dumps(message, indent=2) for message in unpacked_messages))
         # 4. Return unpacked messages
         return unpacked_messages
 
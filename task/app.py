@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import uvicorn
@@ -12,6 +13,7 @@ from task.tools.files.file_content_extraction_tool import FileContentExtractionT
 from task.tools.py_interpreter.python_code_interpreter_tool import PythonCodeInterpreterTool
 from task.tools.mcp.mcp_client import MCPClient
 from task.tools.mcp.mcp_tool import MCPTool
+from task.tools.mcp.mcp_tool_model import MCPToolModel
 from task.tools.rag.document_cache import DocumentCache
 from task.tools.rag.rag_tool import RagTool
 
@@ -19,21 +21,40 @@ DIAL_ENDPOINT = os.getenv('DIAL_ENDPOINT', "http://localhost:8080")
 # DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'gpt-4o')
 DEPLOYMENT_NAME = os.getenv('DEPLOYMENT_NAME', 'claude-sonnet-4')
 
+# MCP discovery is a network round-trip, so connected clients and their tool catalogs are cached
+# at module scope (keyed by server URL). This keeps warm restarts of the application instance from
+# re-opening connections and re-listing tools for the same server.
+_MCP_CLIENTS: dict[str, MCPClient] = {}
+_MCP_TOOLS_CACHE: dict[str, list[MCPToolModel]] = {}
+
 
 class GeneralPurposeAgentApplication(ChatCompletion):
 
     def __init__(self):
         self.tools: list[BaseTool] = []
+        # Guards against N concurrent first-requests each running `_create_tools`: only one request
+        # performs the (network-heavy) initialization; arrivals that see it already underway wait
+        # on the event instead of queueing on the lock.
+        self._tools_lock = asyncio.Lock()
+        self._tools_ready = asyncio.Event()
 
     async def _get_mcp_tools(self, url: str) -> list[BaseTool]:
         #TODO:
         # 1. Create list of BaseTool
         mcp_tools: list[BaseTool] = []
-        # 2. Create MCPClient
-        mcp_client = await MCPClient.create(mcp_server_url=url)
-        # 3. Get tools, iterate through them and add them to created list as MCPTool where the client will be created
-        #    MCPClient and mcp_tool_model will be the tool itself (see what `mcp_client.get_tools` returns).
-        for mcp_tool_model in await mcp_client.get_tools():
+        # 2. Create MCPClient (reuse the already connected one for this URL if present)
+        mcp_client = _MCP_CLIENTS.get(url)
+        if mcp_client is None:
+            mcp_client = await MCPClient.create(mcp_server_url=url)
+            _MCP_CLIENTS[url] = mcp_client
+        # 3. Get tools (cached per URL to skip the discovery round-trip), iterate through them and add them to created
+        #    list as MCPTool where the client will be created MCPClient and mcp_tool_model will be the tool itself
+        #    (see what `mcp_client.get_tools` returns).
+        mcp_tool_models = _MCP_TOOLS_CACHE.get(url)
+        if mcp_tool_models is None:
+            mcp_tool_models = await mcp_client.get_tools()
+            _MCP_TOOLS_CACHE[url] = mcp_tool_models
+        for mcp_tool_model in mcp_tool_models:
             mcp_tools.append(MCPTool(client=mcp_client, mcp_tool_model=mcp_tool_model))
         # 4. Return created tool list
         return mcp_tools
@@ -76,8 +97,17 @@ class GeneralPurposeAgentApplication(ChatCompletion):
     async def chat_completion(self, request: Request, response: Response) -> None:
         #TODO:
         # 1. If `self.tools` are absent then call `_create_tools` method and assign to the `self.tools`
-        if not self.tools:
-            self.tools = await self._create_tools()
+        #    (one-shot async guard: only the first request builds the tools, concurrent ones wait)
+        if not self._tools_ready.is_set():
+            if self._tools_lock.locked():
+                # Initialization is already underway; wait for it to finish without contending
+                # the lock (the event stays set forever afterwards, so this never blocks again)
+                await self._tools_ready.wait()
+            else:
+                async with self._tools_lock:
+                    if not self._tools_ready.is_set():
+                        self.tools = await self._create_tools()
+                        self._tools_ready.set()
         # 2. Create `choice` (`with response.create_single_choice() as choice:`) and:
         #   - Create GeneralPurposeAgent with:
         #       - endpoint=DIAL_ENDPOINT
@@ -113,5 +143,26 @@ CREATED_DIAL_APP.add_chat_completion(
     deployment_name="general-purpose-agent",
     impl=agent_app,
 )
-# 4. Run it with uvicorn: `uvicorn.run({CREATED_DIAL_APP}, port=5030, host="0.0.0.0")`
-uvicorn.run(CREATED_DIAL_APP, port=5030, host="0.0.0.0")
+
+
+@CREATED_DIAL_APP.on_event("shutdown")
+async def _close_tool_clients() -> None:
+    for tool in agent_app.tools:
+        aclose = getattr(tool, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+
+# 4. Run it with uvicorn. Guarded by `__main__` so importing `task.app` doesn't block, and the app
+#    is passed as an import string to allow multi-process scaling via WEB_CONCURRENCY. uvloop +
+#    httptools cut per-request event loop overhead for this I/O-bound proxy workload.
+if __name__ == "__main__":
+    uvicorn.run(
+        "task.app:CREATED_DIAL_APP",
+        port=5030,
+        host="0.0.0.0",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="uvloop",
+        http="httptools",
+    )
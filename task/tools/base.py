@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Literal
 
 from aidial_client.types.chat import ToolParam, FunctionParam
 from aidial_client.types.chat.legacy.chat_completion import Role
@@ -11,6 +11,10 @@ from task.tools.models import ToolCallParams
 
 class BaseTool(ABC):
 
+    # Lazily built, frozen ToolParam — the schema never changes at runtime, so it is constructed
+    # once per tool instead of once per agent turn (see the `schema` property)
+    _schema: ToolParam | None = None
+
     async def execute(self, tool_call_params: ToolCallParams) -> Message:
         #TODO:
         # 1. Create Message obj with:
@@ -46,6 +50,18 @@ class BaseTool(ABC):
     def show_in_stage(self) -> bool:
         return True
 
+    @property
+    def estimated_latency_class(self) -> Literal["fast", "medium", "slow"]:
+        """Rough latency bin used by the agent dispatcher to start slow tools first, so a
+        multi-tool turn costs roughly max(slow) instead of queueing behind quick calls."""
+        return "medium"
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether results for identical arguments can be served from the shared tool result cache.
+        Non-deterministic tools (e.g. image generation) must override this with False."""
+        return True
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -67,11 +83,13 @@ class BaseTool(ABC):
         #TODO:
         # see https://dialx.ai/dial_api#operation/sendChatCompletionRequest -> `tools`
         # or https://platform.openai.com/docs/guides/function-calling#defining-functions
-        return ToolParam(
-            type="function",
-            function=FunctionParam(
-                name=self.name,
-                description=self.description,
-                parameters=self.parameters
+        if self._schema is None:
+            self._schema = ToolParam(
+                type="function",
+                function=FunctionParam(
+                    name=self.name,
+                    description=self.description,
+                    parameters=self.parameters
+                )
             )
-        )
+        return self._schema
@@ -1,5 +1,7 @@
-import json
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Any
 
 from aidial_client import AsyncDial
@@ -9,11 +11,62 @@ from pydantic import StrictStr
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
 
+# Stage writes are coalesced instead of flushed per token: one frame per batch of deltas or per
+# flush window, whichever comes first. Keeps perceived latency negligible while cutting the number
+# of outbound SSE frames by an order of magnitude on high-token-rate streams.
+_STAGE_FLUSH_BATCH = 32
+_STAGE_FLUSH_INTERVAL = 0.05
+
+_CLIENT_CACHE_MAX_SIZE = 32
+
 
 class DeploymentTool(BaseTool, ABC):
 
+    # Most deployments are text-only; subclasses that emit attachments (image generation) set this
+    # to True so the streaming loop checks delta.custom_content only where it can actually appear
+    supports_attachments: bool = False
+
     def __init__(self, endpoint: str):
         self.endpoint = endpoint
+        # AsyncDial clients are cached per api_key so repeated tool calls reuse the same connection
+        # pool instead of paying a new TCP/TLS handshake each time. DIAL issues per-request keys,
+        # so the cache is a bounded LRU with close-on-evict: stale clients are shut down instead of
+        # accumulating an open connection pool per request served.
+        self._clients: OrderedDict[str, AsyncDial] = OrderedDict()
+        self._clients_lock = asyncio.Lock()
+
+    async def _get_client(self, api_key: str) -> AsyncDial:
+        client = self._clients.get(api_key)
+        if client is None:
+            async with self._clients_lock:
+                client = self._clients.get(api_key)
+                if client is None:
+                    client = AsyncDial(
+                        base_url=self.endpoint,
+                        api_key=api_key,
+                        api_version="2025-01-01-preview")
+                    self._clients[api_key] = client
+                    while len(self._clients) > _CLIENT_CACHE_MAX_SIZE:
+                        _, evicted = self._clients.popitem(last=False)
+                        await self._close_client(evicted)
+        else:
+            self._clients.move_to_end(api_key)
+        return client
+
+    @staticmethod
+    async def _close_client(client: AsyncDial) -> None:
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"Warning: Error closing Dial client: {e}")
+
+    async def aclose(self) -> None:
+        """Close all cached AsyncDial clients. Called on application shutdown."""
+        async with self._clients_lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await self._close_client(client)
 
     @property
     @abstractmethod
@@ -26,18 +79,15 @@ class DeploymentTool(BaseTool, ABC):
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
         #TODO:
-        # 1. Load arguments with `json`
-        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        # 1. Get parsed arguments (memoized, not mutated here)
+        arguments = tool_call_params.parsed_args
         # 2. Get `prompt` from arguments (by default we provide `prompt` for each deployment tool, use this param name as standard)
         prompt = arguments.get("prompt")
-        # 3. Delete `prompt` from `arguments` (there can be provided additional parameters and `prompt` will be added
-        #    as user message content and other parameters as `custom_fields`)
-        arguments.pop("prompt", None)
-        # 4. Create AsyncDial client (api_version is 2025-01-01-preview)
-        client = AsyncDial(
-            base_url=self.endpoint,
-            api_key=tool_call_params.api_key,
-            api_version="2025-01-01-preview")
+        # 3. Everything except `prompt` becomes the `custom_fields` configuration; built in one
+        #    pass instead of copy + pop + spread
+        configuration = {k: v for k, v in arguments.items() if k != "prompt"}
+        # 4. Get cached AsyncDial client (api_version is 2025-01-01-preview)
+        client = await self._get_client(tool_call_params.api_key)
         # 5. Call chat completions with:
         #   - messages (here will be just user message. Optionally, in this class you can add system prompt `property`
         #     and if any deployment tool provides system prompt then we need to set it as first message (system prompt))
@@ -52,46 +102,60 @@ class DeploymentTool(BaseTool, ABC):
             deployment_name=self.deployment_name,
             extra_body={
                 "custom_fields": {
-                    "configuration": {**arguments}
+                    "configuration": configuration
                 }
             },
             **self.tool_parameters,
         )
         # 6. Collect content and it to stage, also, collect custom_content -> attachments and if they are present add
         #    them to stage as attachment as well
-        content = ''
+        content_parts: list[str] = []
         custom_content: CustomContent = CustomContent(attachments=[])
+        pending: list[str] = []
+        last_flush = time.monotonic()
+        supports_attachments = self.supports_attachments
         async for chunk in chunks:
             # collect content
             if not chunk.choices or not chunk.choices[0].delta:
                 continue
-            
+
             delta = chunk.choices[0].delta
             if delta.content:
-                tool_call_params.stage.append_content(delta.content)
-                content += delta.content
+                content_parts.append(delta.content)
+                pending.append(delta.content)
+                now = time.monotonic()
+                if len(pending) >= _STAGE_FLUSH_BATCH or now - last_flush >= _STAGE_FLUSH_INTERVAL:
+                    tool_call_params.stage.append_content(''.join(pending))
+                    pending.clear()
+                    last_flush = now
 
             # collect custom_content -> attachments
+            if not supports_attachments:
+                continue
+
             if not delta.custom_content or not delta.custom_content.attachments:
                 continue
 
-            attachments = delta.custom_content.attachments
-            custom_content.attachments.extend(attachments)
+            custom_content.attachments.extend(delta.custom_content.attachments)
+
+        if pending:
+            tool_call_params.stage.append_content(''.join(pending))
 
-            for attachment in attachments:
-                tool_call_params.stage.add_attachment(
+        # Attachments are propagated to the stage only after the stream is fully drained, so the
+        # (sync) add_attachment calls don't block chunk reception on the critical path
+        for attachment in custom_content.attachments:
+            tool_call_params.stage.add_attachment(
                 type=attachment.type,
                 title=attachment.title,
                 data=attachment.data,
                 url=attachment.url,
                 reference_url=attachment.reference_url,
                 reference_type=attachment.reference_type,
-                )
-                
+            )
         # 7. Return Message with tool role, content, custom_content and tool_call_id
         return Message(
             role=Role.TOOL,
-            content=content,
+            content=''.join(content_parts),
             custom_content=custom_content,
             tool_call_id=tool_call_params.tool_call.id
         )
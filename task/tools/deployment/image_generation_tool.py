@@ -6,9 +6,54 @@ from pydantic import StrictStr
 from task.tools.deployment.base import DeploymentTool
 from task.tools.models import ToolCallParams
 
+_IMAGE_TYPES = frozenset({"image/png", "image/jpeg"})
+
 
 class ImageGenerationTool(DeploymentTool):
 
+    supports_attachments = True
+
+    # Built once at class construction; the schema dict is shared across all accesses instead of
+    # being re-allocated every time the agent requests it.
+    _PARAMETERS: dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "Extensive description of the image that should be generated."
+            },
+            "size": {
+                "type": "string",
+                "description": "The size of the generated image.",
+                "enum": [
+                    "1024x1024",
+                    "1024x1792",
+                    "1792x1024"
+                ],
+                "default": "1024x1024"
+            },
+            "style": {
+                "type": "string",
+                "description": "The style of the generated image. Must be one of `vivid` or `natural`. \n- `vivid` causes the model to lean towards generating hyperrealistic and dramatic images. \n- `natural` causes the model to produce more natural, less realistic looking images.",
+                "enum": [
+                    "natural",
+                    "vivid"
+                ],
+                "default": "natural"
+            },
+            "quality": {
+                "type": "string",
+                "description": "The quality of the image that will be generated. ‘hd’ creates images with finer details and greater consistency across the image.",
+                "enum": [
+                    "standard",
+                    "hd"
+                ],
+                "default": "standard"
+            }
+        },
+        "required": ["prompt"],
+    }
+
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
         #TODO:
         # In this override impl we just need to add extra actions, we need to propagate attachment to the Choice since
@@ -20,9 +65,14 @@ class ImageGenerationTool(DeploymentTool):
         # 2. If attachments are present then filter only "image/png" and "image/jpeg"
         if isinstance(message, Message) and message.custom_content and message.custom_content.attachments:
         # 3. Append then as content to choice in such format `f"\n\r![image]({attachment.url})\n\r")`
-            for attachment in message.custom_content.attachments:
-                if attachment.type in ["image/png", "image/jpeg"]:
-                    tool_call_params.choice.append_content(f"\n\r![image]({attachment.url})\n\r")
+        #    (joined into a single append so N images cost one streamed frame, not N)
+            images_md = '\n\r'.join(
+                f"![image]({attachment.url})"
+                for attachment in message.custom_content.attachments
+                if attachment.type in _IMAGE_TYPES
+            )
+            if images_md:
+                tool_call_params.choice.append_content(f"\n\r{images_md}\n\r")
         # 4. After iteration through attachment if message content is absent add such instruction:
         #    'The image has been successfully generated according to request and shown to user!'
         #    Sometimes models are trying to add generated pictures as well to content (choice), with this instruction
@@ -32,6 +82,16 @@ class ImageGenerationTool(DeploymentTool):
         # 5. Return Message with tool role, content, custom_content and tool_call_id
         return message
 
+    @property
+    def estimated_latency_class(self) -> str:
+        # Image generation takes seconds; started first in a multi-tool turn
+        return "slow"
+
+    @property
+    def cacheable(self) -> bool:
+        # Image generation is non-deterministic, the same prompt should produce a fresh image
+        return False
+
     @property
     def deployment_name(self) -> str:
         # TODO: provide deployment name for model that you have added to DIAL Core config (dall-e-3)
@@ -54,42 +114,5 @@ class ImageGenerationTool(DeploymentTool):
         #  - prompt is string, description: "Extensive description of the image that should be generated.", required
         #  - there are 3 optional parameters: https://platform.openai.com/docs/guides/image-generation?image-generation-model=dall-e-3#customize-image-output
         #  - Sample: https://learn.microsoft.com/en-us/azure/ai-foundry/openai/how-to/dall-e?tabs=dalle-3#call-the-image-generation-api
-        return {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "Extensive description of the image that should be generated."
-                },
-                "size": {
-                    "type": "string",
-                    "description": "The size of the generated image.",
-                    "enum": [
-                        "1024x1024",
-                        "1024x1792",
-                        "1792x1024"
-                    ],
-                    "default": "1024x1024"
-                },
-                "style": {
-                    "type": "string",
-                    "description": "The style of the generated image. Must be one of `vivid` or `natural`. \n- `vivid` causes the model to lean towards generating hyperrealistic and dramatic images. \n- `natural` causes the model to produce more natural, less realistic looking images.",
-                    "enum": [
-                        "natural",
-                        "vivid"
-                    ],
-                    "default": "natural"
-                },
-                "quality": {
-                    "type": "string",
-                    "description": "The quality of the image that will be generated. ‘hd’ creates images with finer details and greater consistency across the image.",
-                    "enum": [
-                        "standard",
-                        "hd"
-                    ],
-                    "default": "standard"
-                }
-            },
-            "required": ["prompt"],
-        }
+        return self._PARAMETERS
 
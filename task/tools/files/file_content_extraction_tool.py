@@ -1,12 +1,27 @@
-import json
+import asyncio
+from collections import OrderedDict
 from typing import Any
 
 from aidial_sdk.chat_completion import Message
 
 from task.tools.base import BaseTool
 from task.tools.models import ToolCallParams
+from task.tools.tool_result_cache import TOOL_RESULT_CACHE, ToolResultCache
 from task.utils.dial_file_conent_extractor import DialFileContentExtractor
 
+_PAGE_SIZE = 10_000
+
+# Extracted text cached per file_url (LRU, bounded), pre-chunked into 10_000-char pages so page
+# lookup is an O(1) list index instead of a fresh slice of the whole document on every call.
+_EXTRACTED_TEXT_CACHE: OrderedDict[str, list[str]] = OrderedDict()
+_EXTRACTED_TEXT_CACHE_MAX_SIZE = 64
+
+_EXTRACTOR_CACHE_MAX_SIZE = 32
+
+
+def _split_into_pages(full_text: str) -> list[str]:
+    return [full_text[i:i + _PAGE_SIZE] for i in range(0, len(full_text), _PAGE_SIZE)]
+
 
 class FileContentExtractionTool(BaseTool):
     """
@@ -15,8 +30,53 @@ class FileContentExtractionTool(BaseTool):
     USAGE: Start with page=1 (by default)
     """
 
+    # Built once at class construction; `parameters` is requested per agent iteration per tool,
+    # so returning a shared dict avoids re-allocating the same literal on every access.
+    _PARAMETERS: dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "file_url": {
+                "type": "string",
+                "description": "URL of the file to extract content from."
+            },
+            "page": {
+                "type": "integer",
+                "description": "For large documents pagination is enabled. Each page consists of 10000 characters.",
+                "default": 1
+            }
+        },
+        "required": ["file_url"]
+    }
+
     def __init__(self, endpoint: str):
         self.endpoint = endpoint
+        # Extractors wrap a Dial client with its own connection pool, so they are cached per
+        # api_key (bounded LRU) instead of re-constructed on every call
+        self._extractor_cache: OrderedDict[str, DialFileContentExtractor] = OrderedDict()
+        self._extractor_lock = asyncio.Lock()
+
+    async def _get_extractor(self, api_key: str) -> DialFileContentExtractor:
+        extractor = self._extractor_cache.get(api_key)
+        if extractor is None:
+            async with self._extractor_lock:
+                extractor = self._extractor_cache.get(api_key)
+                if extractor is None:
+                    extractor = DialFileContentExtractor(self.endpoint, api_key)
+                    self._extractor_cache[api_key] = extractor
+                    while len(self._extractor_cache) > _EXTRACTOR_CACHE_MAX_SIZE:
+                        _, evicted = self._extractor_cache.popitem(last=False)
+                        evicted.close()
+        else:
+            self._extractor_cache.move_to_end(api_key)
+        return extractor
+
+    async def aclose(self) -> None:
+        """Close all cached extractors. Called on application shutdown."""
+        async with self._extractor_lock:
+            extractors = list(self._extractor_cache.values())
+            self._extractor_cache.clear()
+        for extractor in extractors:
+            extractor.close()
 
     @property
     def show_in_stage(self) -> bool:
@@ -41,75 +101,73 @@ class FileContentExtractionTool(BaseTool):
         # TODO: provide tool parameters JSON Schema:
         #  - file_url is string, required
         #  - page is integer, by default 1, description: "For large documents pagination is enabled. Each page consists of 10000 characters."
-        return {
-            "type": "object",
-            "properties": {
-                "file_url": {
-                    "type": "string",
-                    "description": "URL of the file to extract content from."
-                },
-                "page": {
-                    "type": "integer",
-                    "description": "For large documents pagination is enabled. Each page consists of 10000 characters.",
-                    "default": 1
-                }
-            },
-            "required": ["file_url"]
-        }
+        return self._PARAMETERS
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
         #TODO:
-        # 1. Load arguments with `json`
-        arguments = json.loads(tool_call_params.tool_call.function.arguments)
+        # 1. Get parsed arguments (parsed once, memoized on the params object)
+        arguments = tool_call_params.parsed_args
         # 2. Get `file_url` from arguments
         file_url = arguments.get("file_url")
         # 3. Get `page` from arguments (if none, set as 1 by default)
         page = arguments.get("page", 1)
         # 4. Get stage from `tool_call_params`
         stage = tool_call_params.stage
-        # 5. Append content to stage: "## Request arguments: \n"
-        if (not self.show_in_stage):
-            stage.append_content("## Request arguments: \n")
-        # 6. Append content to stage: `f"**File URL**: {file_url}\n\r"`
-        if (not self.show_in_stage):
-            stage.append_content(f"**File URL**: {file_url}\n\r")
-        # 7. If `page` more than 1 then append content to stage: `f"**Page**: {page}\n\r"`
-        if page > 1 and (not self.show_in_stage):
-            stage.append_content(f"**Page**: {page}\n\r")
-        # 8. Append content to stage: "## Response: \n"
-        if (not self.show_in_stage):
-            stage.append_content("## Response: \n")
+        # 5-8. Stage prelude (request arguments + response header) is buffered and flushed together
+        #      with the response body in a single `append_content` call: one streamed frame instead
+        #      of five. `show_in_stage` is a constant property, so it is read into a local once
+        #      instead of paying a descriptor call per guard.
+        show_in_stage = self.show_in_stage
+        prelude: list[str] = []
+        if not show_in_stage:
+            prelude.append("## Request arguments: \n")
+            prelude.append(f"**File URL**: {file_url}\n\r")
+            if page > 1:
+                prelude.append(f"**Page**: {page}\n\r")
+            prelude.append("## Response: \n")
         # 9. Implement `task.utils.dial_file_conent_extractor`, create DialFileContentExtractor and call `extract_text`
-        #    method as `content`
-        content_extractor = DialFileContentExtractor(self.endpoint, tool_call_params.api_key)
-        content = content_extractor.extract_text(file_url)
-        # 10. If no `content` present then set it as "Error: File content not found."
-        if not content:
+        #    method as `content`. Re-reads of the same (file_url, page) are served from the shared
+        #    result cache to skip the download + parse.
+        cache_key = ToolResultCache.make_key(self.name, {"file_url": file_url, "page": page})
+        cached_content = TOOL_RESULT_CACHE.get(cache_key) if self.cacheable else None
+        if cached_content is not None:
+            if not show_in_stage:
+                stage.append_content(''.join((*prelude, f"```text\n\r{cached_content}\n\r```\n\r")))
+            return cached_content
+        pages = _EXTRACTED_TEXT_CACHE.get(file_url)
+        if pages is not None:
+            _EXTRACTED_TEXT_CACHE.move_to_end(file_url)
+        else:
+            content_extractor = await self._get_extractor(tool_call_params.api_key)
+            pages = _split_into_pages(await content_extractor.extract_text_async(file_url))
+            if pages:
+                _EXTRACTED_TEXT_CACHE[file_url] = pages
+                while len(_EXTRACTED_TEXT_CACHE) > _EXTRACTED_TEXT_CACHE_MAX_SIZE:
+                    _EXTRACTED_TEXT_CACHE.popitem(last=False)
+        total_pages = len(pages)
+        # 10. If no content present then set it as "Error: File content not found."
+        if not pages:
             content = "Error: File content not found."
-        # 11. If `content` len is more than 10_000 then we need to enable pagination:
-        #       - create variable `page_size` as 10_000
-        #       - calculate total pages, formula: (`content len` + `page_size` - 1) // `page_size`
+        # 11. Single-page files are returned as-is; larger files are paginated:
+        #       - pages were pre-chunked once when the text entered the cache, lookup is by index
         #       - if `page` is less then 1 (potential hallucination from LLM) then set it as 1
         #       - otherwise check if page > total pages (potential hallucination), it yes then set `content` as
         #         `f"Error: Page {page} does not exist. Total pages: {total_pages}"`
-        #       - prepare `start_index`: `(page - 1) * page_size`
-        #       - prepare `end_index`: `start_index + page_size`
-        #       - get page content from `content` that will start with `start_index` and end with `end_index`
         #       - set `content` as `f"{page_content}\n\n**Page #{page}. Total pages: {total_pages}**"` (It will show to
         #         LLM that it is not full content and it is pageable)
-            page_size = 10_000
-            total_pages = (len(content) + page_size - 1) // page_size
+        elif total_pages == 1:
+            content = pages[0]
+        else:
             if page < 1:
                 page = 1
-            elif page > total_pages:
+            if page > total_pages:
                 content = f"Error: Page {page} does not exist. Total pages: {total_pages}"
             else:
-                start_index = (page - 1) * page_size
-                end_index = start_index + page_size
-                page_content = content[start_index:end_index]
-                content = f"{page_content}\n\n**Page #{page}. Total pages: {total_pages}**"
-        # 12. Append content to stage: `f"```text\n\r{content}\n\r```\n\r"` (Will be shown in stage as markdown text)
-        if (not self.show_in_stage):
-            stage.append_content(f"```text\n\r{content}\n\r```\n\r")
-        # 13. Return `content`
+                content = f"{pages[page - 1]}\n\n**Page #{page}. Total pages: {total_pages}**"
+        # 12. Append buffered prelude + content to stage in one shot (content is shown as markdown text)
+        if not show_in_stage:
+            stage.append_content(''.join((*prelude, f"```text\n\r{content}\n\r```\n\r")))
+        # 13. Return `content` (cache it first, but never cache error responses)
+        if self.cacheable and not content.startswith("Error:"):
+            TOOL_RESULT_CACHE.set(cache_key, content)
         return content
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Optional, Any
 
 from mcp import ClientSession
@@ -93,6 +94,17 @@ class MCPClient:
 
         return content
 
+    async def call_tool_batch(self, calls: list[tuple[str, dict[str, Any]]]) -> list[Any]:
+        """Call several tools over the same session with overlapping in-flight requests.
+
+        The streamable HTTP transport multiplexes JSON-RPC requests by id, so N concurrent calls
+        cost max-of-RTT instead of sum-of-RTT when the LLM emits multiple MCP tool calls per turn.
+        """
+        if not self.session:
+            raise RuntimeError("MCP client not connected.")
+
+        return await asyncio.gather(*(self.call_tool(tool_name, tool_args) for tool_name, tool_args in calls))
+
     async def get_resource(self, uri: AnyUrl) -> str | bytes:
         """Get specific resource content"""
         #TODO: Get and return resource. Resources can be returned as TextResourceContents and BlobResourceContents, you
@@ -1,4 +1,3 @@
-import json
 from typing import Any
 
 from aidial_sdk.chat_completion import Message
@@ -7,6 +6,7 @@ from task.tools.base import BaseTool
 from task.tools.mcp.mcp_client import MCPClient
 from task.tools.mcp.mcp_tool_model import MCPToolModel
 from task.tools.models import ToolCallParams
+from task.tools.tool_result_cache import TOOL_RESULT_CACHE, ToolResultCache
 
 
 class MCPTool(BaseTool):
@@ -17,29 +17,45 @@ class MCPTool(BaseTool):
         self._client = client
         # 2. Set mcp_tool_model
         self._mcp_tool_model = mcp_tool_model
+        # Cache plain references so the hot `name`/`description`/`parameters` accessors skip the
+        # pydantic getter chain on every agent iteration
+        self._name = mcp_tool_model.name
+        self._description = mcp_tool_model.description
+        self._parameters = mcp_tool_model.parameters
 
     async def _execute(self, tool_call_params: ToolCallParams) -> str | Message:
         #TODO:
-        # 1. Load arguments wit `json`
-        tool_args = json.loads(tool_call_params.tool_call.function.arguments)
-        # 2. Get content with mcp client tool call
-        content = await self._client.call_tool(self._mcp_tool_model.name, tool_args)
+        # 1. Get parsed arguments (parsed once, memoized on the params object)
+        tool_args = tool_call_params.parsed_args
+        # 2. Get content with mcp client tool call (served from the shared result cache when the
+        #    same tool was already called with identical arguments)
+        cache_key = ToolResultCache.make_key(self._mcp_tool_model.name, tool_args)
+        content = TOOL_RESULT_CACHE.get(cache_key) if self.cacheable else None
+        if content is None:
+            content = await self._client.call_tool(self._mcp_tool_model.name, tool_args)
+            if self.cacheable and content is not None:
+                TOOL_RESULT_CACHE.set(cache_key, content)
         # 3. Append retrieved content to stage
         tool_call_params.stage.append_content(content)
         # 4. return content
         return content
 
+    @property
+    def estimated_latency_class(self) -> str:
+        # MCP calls are typically millisecond-scale
+        return "fast"
+
     @property
     def name(self) -> str:
         # TODO: provide name from mcp_tool_model
-        return self._mcp_tool_model.name
+        return self._name
 
     @property
     def description(self) -> str:
         # TODO: provide description from mcp_tool_model
-        return self._mcp_tool_model.description
+        return self._description
 
     @property
     def parameters(self) -> dict[str, Any]:
         # TODO: provide parameters from mcp_tool_model
-        return self._mcp_tool_model.parameters
+        return self._parameters
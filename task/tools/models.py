@@ -1,4 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import orjson
 from aidial_sdk.chat_completion import Stage, Choice
 from aidial_client.types.chat.legacy.chat_completion import ToolCall
 
@@ -10,3 +13,12 @@ class ToolCallParams:
     choice: Choice
     api_key: str
     conversation_id: str
+    _parsed_args: Optional[dict[str, Any]] = field(default=None, init=False, repr=False)
+
+    @property
+    def parsed_args(self) -> dict[str, Any]:
+        """Tool call arguments parsed once and memoized, so retries don't re-parse the JSON.
+        Callers that mutate the arguments must copy the dict first."""
+        if self._parsed_args is None:
+            self._parsed_args = orjson.loads(self.tool_call.function.arguments)
+        return self._parsed_args
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+
+class ToolResultCache:
+    """
+    Thread-safe bounded LRU cache for deterministic tool call results.
+
+    Agent loops frequently re-call the same tool with identical arguments (e.g. re-reading the
+    same file page); caching the result skips the redundant network round-trip. Tools that are
+    non-deterministic (image generation) must not use it — see `BaseTool.cacheable`.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: Optional[timedelta] = None):
+        self._cache: OrderedDict[str, tuple[Any, datetime]] = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Any) -> str:
+        """Build a stable cache key from the tool name and its (canonicalized) arguments."""
+        raw = f"{tool_name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+        return hashlib.blake2b(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            value, timestamp = entry
+            if self._ttl is not None and datetime.now() - timestamp > self._ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = (value, datetime.now())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared across all cacheable tools, one entry per (tool name, arguments) pair.
+TOOL_RESULT_CACHE = ToolResultCache(max_size=256, ttl=timedelta(minutes=15))
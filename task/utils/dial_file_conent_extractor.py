@@ -1,3 +1,4 @@
+import asyncio
 import io
 from pathlib import Path
 
@@ -17,6 +18,21 @@ class DialFileContentExtractor:
             api_key=api_key,
         )
 
+    def close(self) -> None:
+        """Close the underlying Dial client. Called on application shutdown."""
+        try:
+            self.dial_client.close()
+        except Exception as e:
+            print(f"Warning: Error closing Dial client: {e}")
+
+    async def extract_text_async(self, file_url: str) -> str:
+        """Non-blocking variant of `extract_text`.
+
+        The download and the CPU-bound parsing (PDF text layer, HTML) run in a worker thread, so
+        the event loop stays free to service other tool calls in the meantime.
+        """
+        return await asyncio.to_thread(self.extract_text, file_url)
+
     def extract_text(self, file_url: str) -> str:
         #TODO:
         # 1. Download with Dial client file by `file_url` (files -> download)